@@ -1,5 +1,10 @@
+import logging
+
 from union_find import UnionFind
 
+# Debug tracing of the analysis, silent unless logging is set to DEBUG
+log = logging.getLogger(__name__)
+
 
 class TypeNode:
     """
@@ -10,20 +15,25 @@ class TypeNode:
 
     """
 
-    def __init__(self, uf_id=None, tau=None, lam=None):
+    # Fixed attribute layout, avoids a per-node __dict__
+    __slots__ = ("uf_id", "tau", "lam", "lam_args", "lam_rets")
+
+    def __init__(self, uf_id, tau=None, lam=None):
         self.uf_id = uf_id
 
         self.tau = tau
 
         self.lam = lam
 
-        # List of UF IDs
-        self.lam_args = []
-        self.lam_rets = []
+        # Tuples of UF IDs, only allocated for lambda types (None otherwise)
+        self.lam_args = None
+        self.lam_rets = None
 
+    # Bottom means no type yet: neither a ref type (tau, lam) nor a lambda
+    # type (lam_args, lam_rets)
     @property
     def is_bottom(self):
-        return self.tau is None and self.lam is None
+        return self.tau is None and self.lam is None and self.lam_args is None
 
     def __str__(self):
         return f"TypeNode(uf_id={self.uf_id}, is_bottom={self.is_bottom}, tau={self.tau}, lam={self.lam})"
@@ -45,10 +55,14 @@ class Analyst:
         # The Union-Find instance used for managing Types
         self.uf = UnionFind()
 
+        # Bound find method, saves an attribute lookup on every ECR query
+        self._find = self.uf.find
+
         # A mapping of UF IDs to TypeNodes (type() in Steensgaard's paper)
         self.nodes = {}
 
-        # A mapping of UF IDs to sets of pending UF IDs
+        # A mapping of UF IDs to lists of pending UF IDs. Lists are only
+        # allocated once an ID actually gets a pending entry (most never do)
         self.pending = {}
 
         # The next unused numerical ID for new Type creation
@@ -57,11 +71,16 @@ class Analyst:
     # Helper function for finding ECR representatives of UF IDs
     def ecr(self, x):
         # Find representative of x
-        return self.uf.find(x)
+        return self._find(x)
 
     # Helper function: get TypeNode for an UF ID
     def node_for(self, x):
-        return self.nodes[self.ecr(x)]
+        return self.nodes[self._find(x)]
+
+    # Helper function: remove and return the pending UF IDs of x, without
+    # duplicates. Used once x gets a type, after which nothing is pending on it
+    def pop_pending(self, x):
+        return list(dict.fromkeys(self.pending.pop(x, ())))
 
     # Instantiation of a new Type node
     def new_type(self, uf_id):
@@ -74,97 +93,126 @@ class Analyst:
         # Assume ID is variable name
         self.nodes[uf_id] = node
 
-        # Initialize pending set for new ID
-        self.pending[uf_id] = set()
-
         return node
 
+    # Batch instantiation of Type nodes, e.g. for all variables of a program
+    def new_types(self, uf_ids):
+        # Like UnionFind.add_all, IDs that already have a node keep it
+        nodes = self.nodes
+        uf_ids = [uf_id for uf_id in uf_ids if uf_id not in nodes]
+        self.uf.add_all(uf_ids)
+        nodes.update({uf_id: TypeNode(uf_id) for uf_id in uf_ids})
+
     def fresh_type(self):
         new_id = self.next_id
         self.next_id += 1
         return self.new_type(new_id)  # Register new type in UF
 
+    # Batch version of fresh_type, returns the UF IDs of n new types
+    def fresh_types(self, n):
+        start = self.next_id
+        self.next_id += n
+        new_ids = tuple(range(start, self.next_id))
+        self.new_types(new_ids)
+        return new_ids
+
     # e1 and e2 are UF IDs
     def join(self, e1, e2):
-        t1 = self.nodes[e1]
-        t2 = self.nodes[e2]
-
-        e = self.uf.union(e1, e2)
-
-        if t1.is_bottom:
-            self.assign_type(e, t2)
-
-            if t2.is_bottom:
-                self.pending[e] = self.pending[e1] | self.pending[e2]
-            else:
-                for x in self.pending[e1]:
-                    self.join(e, x)
-        else:
-            self.assign_type(e, t1)
-
-            if t2.is_bottom:
-                for x in self.pending[e2]:
-                    self.join(e, x)
+        self.join_all([(e1, e2)])
+
+    # pairs is a list of (e1, e2) UF ID pairs, joined in order
+    def join_all(self, pairs):
+        # Nested joins go on an explicit worklist instead of recursing, so long
+        # chains of unifications cannot hit Python's recursion limit. Pairs are
+        # pushed in reverse so they are handled in the same depth-first order
+        # as the recursive formulation.
+        worklist = pairs[::-1]
+        while worklist:
+            e1, e2 = worklist.pop()
+
+            # Work on the ECR representatives, since the union below may
+            # pick either root as the new representative
+            e1 = self._find(e1)
+            e2 = self._find(e2)
+
+            # Already in the same ECR, so there is nothing left to unify
+            if e1 == e2:
+                continue
+
+            t1 = self.nodes[e1]
+            t2 = self.nodes[e2]
+
+            e = self.uf.union(e1, e2)
+
+            # The merged ECR takes over the non-bottom TypeNode as is. Its
+            # fields are not copied, so t1 and t2 stay intact for unify_tau
+            if t1.is_bottom:
+                self.nodes[e] = t2
+
+                if t2.is_bottom:
+                    # Move the smaller pending list into the larger one
+                    # in place, rather than copying both into a new list
+                    pending1 = self.pending.pop(e1, [])
+                    pending2 = self.pending.pop(e2, [])
+                    if len(pending1) < len(pending2):
+                        pending1, pending2 = pending2, pending1
+                    pending1.extend(pending2)
+                    if pending1:
+                        self.pending[e] = pending1
+                    else:
+                        self.pending.pop(e, None)
+                else:
+                    worklist.extend((e, x) for x in reversed(self.pop_pending(e1)))
             else:
-                self.unify_tau(t1, t2)
-
-    # t1 and t2 are TypeNodes
-    def unify_tau(self, type_e1, type_e2):
+                self.nodes[e] = t1
+
+                if t2.is_bottom:
+                    worklist.extend((e, x) for x in reversed(self.pop_pending(e2)))
+                elif t1.lam_args is not None or t2.lam_args is not None:
+                    # Lambda types (the lam of a function variable)
+                    self.unify_lam(t1, t2, worklist)
+                else:
+                    self.unify_tau(t1, t2, worklist)
+
+    # t1 and t2 are TypeNodes, the pairs still to be joined go onto worklist
+    def unify_tau(self, type_e1, type_e2, worklist):
         tau1 = self.get_tau(type_e1)
-        lam1 = self.get_lam(type_e1)
-
         tau2 = self.get_tau(type_e2)
-        lam2 = self.get_lam(type_e2)
-
-        if tau1 != tau2:
-            self.join(tau1, tau2)
+        lam1, lam2 = self.get_lams(type_e1, type_e2)
 
+        # Pushed in reverse so the taus are joined first
         if lam1 != lam2:
-            self.join(lam1, lam2)
-
-    def unify_lam(self, type_e1, type_e2):
-        lam_args_e1 = type_e1.lam_args
-        lam_args_e2 = type_e2.lam_args
-
-        for i in range(len(lam_args_e1)):
-            tau1 = self.get_tau(lam_args_e1[i])  # self.get_tau(lam_args_e1[i].uf_id)
-            lam1 = self.get_lam(lam_args_e1[i])
-
-            tau2 = self.get_tau(lam_args_e2[i])
-            lam2 = self.get_lam(lam_args_e2[i])
+            worklist.append((lam1, lam2))
 
-            if tau1 != tau2:
-                self.join(tau1, tau2)
-
-            if lam1 != lam2:
-                self.join(lam1, lam2)
-
-        lam_rets_e1 = type_e1.lam_rets
-        lam_rets_e2 = type_e2.lam_rets
-
-        for i in range(len(lam_rets_e1)):
-            tau1 = self.get_tau(lam_rets_e1[i])  # self.get_tau(lam_args_e1[i].uf_id)
-            lam1 = self.get_lam(lam_rets_e1[i])
-
-            tau2 = self.get_tau(lam_rets_e2[i])
-            lam2 = self.get_lam(lam_rets_e2[i])
+        if tau1 != tau2:
+            worklist.append((tau1, tau2))
 
-            if tau1 != tau2:
-                self.join(tau1, tau2)
+    # t1 and t2 are lambda TypeNodes. Their argument and return alphas are
+    # joined position by position, as far as both have them, which unifies
+    # their taus and lambdas (also ones they only get later). The pairs go
+    # onto worklist
+    def unify_lam(self, type_e1, type_e2, worklist):
+        pairs = list(zip(type_e1.lam_args or (), type_e2.lam_args or ()))
+        pairs += zip(type_e1.lam_rets or (), type_e2.lam_rets or ())
 
-            if lam1 != lam2:
-                self.join(lam1, lam2)
+        # Pushed in reverse so they are joined in order
+        worklist.extend(reversed(pairs))
 
     # e1 and e2 are UF IDs
     def cjoin(self, e1, e2):
-        print("cjoin", e1, e2)
+        log.debug("cjoin %s %s", e1, e2)
+        e2 = self._find(e2)
         type_e2 = self.nodes[e2]
 
         if type_e2.is_bottom:
-            print("t2 is bottom, adding pending")
-            self.pending[e2] = {e1} | self.pending[e2]
+            log.debug("t2 is bottom, adding pending")
+            pending = self.pending.get(e2)
+            if pending is None:
+                self.pending[e2] = [e1]
+            else:
+                pending.append(e1)
         else:
-            print("t2 is not bottom, joining")
+            log.debug("t2 is not bottom, joining")
             self.join(e1, e2)
 
     def assign_type(self, e, t):
@@ -176,37 +224,48 @@ class Analyst:
 
     # e1 is a UF ID and t is a TypeNode with properties we want to copy over.
     def settype(self, e, t):
-        print("Set type", e, "to", t)
+        log.debug("Set type %s to %s", e, t)
 
         self.assign_type(e, t)
 
-        for x in self.pending[e]:
-            self.join(e, x)
+        self.join_all([(e, x) for x in self.pop_pending(e)])
+
+    # Helper function: type_ was bottom and has just been given a tau or a
+    # lambda in place. As in settype, whatever waits on its ECR is joined now
+    def join_pending(self, type_):
+        e = self._find(type_.uf_id)
+        if e in self.pending:
+            self.join_all([(e, x) for x in self.pop_pending(e)])
 
     # Helper function for getting a tau reference from a type
     def get_tau(self, type_):
         if type_.tau is None:
             type_.tau = self.fresh_type().uf_id
+            if type_.lam is None:
+                self.join_pending(type_)
         return type_.tau
 
     def handle_assign(self, x, y):
         # handle the assignment x := y
-        ecr_x = self.ecr(x)
-        type_x = self.nodes[ecr_x]
+        find = self._find
+        nodes = self.nodes
+
+        ecr_x = find(x)
+        type_x = nodes[ecr_x]
         tau1 = self.get_tau(type_x)
-        lam1 = type_x.lam
 
-        ecr_y = self.ecr(y)
-        type_y = self.nodes[ecr_y]
+        ecr_y = find(y)
+        type_y = nodes[ecr_y]
         tau2 = self.get_tau(type_y)
-        lam2 = type_y.lam
+        lam1 = self.get_lam(type_x)
+        lam2 = self.get_lam(type_y)
 
-        print("Handling assign:", x, y)
-        print("Types before:", type_x, type_y)
-        print("Taus before:", type_x.tau, type_y.tau)
+        log.debug("Handling assign: %s %s", x, y)
+        log.debug("Types before: %s %s", type_x, type_y)
+        log.debug("Taus before: %s %s", type_x.tau, type_y.tau)
 
         if tau1 != tau2:
-            print("Assign, taus not equal")
+            log.debug("Assign, taus not equal")
             self.cjoin(tau1, tau2)
 
         if lam1 != lam2:
@@ -214,59 +273,87 @@ class Analyst:
 
     def handle_addr_of(self, x, y):
         # handle the assignment x := &y
-        print("Handling address of:", x, y)
+        log.debug("Handling address of: %s %s", x, y)
 
-        ecr_x = self.ecr(x)
+        ecr_x = self._find(x)
         type_x = self.nodes[ecr_x]
-        tau1 = self.get_tau(type_x)
 
-        tau2 = self.ecr(y)
+        tau2 = self._find(y)
 
-        print("ECR:", ecr_x, tau2)
-        print("Taus before:", type_x.tau, tau2)
+        log.debug("ECR: %s %s", ecr_x, tau2)
+        log.debug("Taus before: %s %s", type_x.tau, tau2)
 
-        if tau1 != tau2:
-            self.join(tau1, tau2)
+        if type_x.tau is None:
+            # x does not point anywhere yet: point it straight at y's ECR
+            # rather than creating a fresh tau only to join it with y
+            type_x.tau = tau2
+            # type_x is updated in place, so all settype would have left to
+            # do is joining the pending IDs, and usually there are none
+            if ecr_x in self.pending:
+                self.join_all([(ecr_x, p) for p in self.pop_pending(ecr_x)])
+        elif type_x.tau != tau2:
+            self.join(type_x.tau, tau2)
 
     def handle_deref(self, x, y):
         # x := *y
-        ecr_x = self.ecr(x)
-        type_x = self.nodes[ecr_x]
-        tau1 = self.get_tau(type_x)
-        lam1 = type_x.lam
-
-        ecr_y = self.ecr(y)
-        type_y = self.nodes[ecr_y]
-        tau2 = self.get_tau(type_y)
-
-        type_tau2 = self.nodes[tau2]
+        find = self._find
+        nodes = self.nodes
+        get_tau = self.get_tau
+
+        ecr_x = find(x)
+        type_x = nodes[ecr_x]
+        tau1 = get_tau(type_x)
+
+        ecr_y = find(y)
+        type_y = nodes[ecr_y]
+
+        if type_y.tau is None:
+            # First dereference of y: its fresh target takes x's type as is,
+            # and being new it has nothing pending for settype to join
+            type_y.tau = self.fresh_type().uf_id
+            self.assign_type(type_y.tau, type_x)
+            # y itself may have been bottom though
+            if type_y.lam is None:
+                self.join_pending(type_y)
+            return
+
+        tau2 = find(type_y.tau)
+        type_tau2 = nodes[tau2]
 
         if type_tau2.is_bottom:
             self.settype(tau2, type_x)
         else:
-            tau3 = self.get_tau(type_tau2)
-            lam3 = type_tau2.lam
+            tau3 = get_tau(type_tau2)
+            lam1 = self.get_lam(type_x)
+            lam3 = self.get_lam(type_tau2)
             if tau1 != tau3:
                 self.cjoin(tau1, tau3)
             if lam1 != lam3:
                 self.cjoin(lam1, lam3)
 
     def handle_op(self, x, operands):
+        # Bind hot attributes to locals once for the whole operand loop
+        find = self._find
+        nodes = self.nodes
+        get_tau = self.get_tau
+        get_lam = self.get_lam
+        cjoin = self.cjoin
+
         for y in operands:
-            ecr_x = self.ecr(x)
-            type_x = self.nodes[ecr_x]
-            tau1 = self.get_tau(type_x)
-            lam1 = type_x.lam
+            ecr_x = find(x)
+            type_x = nodes[ecr_x]
+            tau1 = get_tau(type_x)
 
-            ecr_y = self.ecr(y)
-            type_y = self.nodes[ecr_y]
-            tau2 = self.get_tau(type_y)
-            lam2 = type_y.lam
+            ecr_y = find(y)
+            type_y = nodes[ecr_y]
+            tau2 = get_tau(type_y)
+            lam1 = get_lam(type_x)
+            lam2 = get_lam(type_y)
 
             if tau1 != tau2:
-                self.cjoin(tau1, tau2)
+                cjoin(tau1, tau2)
             if lam1 != lam2:
-                self.cjoin(lam1, lam2)
+                cjoin(lam1, lam2)
 
     # Make a dummy type to store new ECRs for allocate()
     def make_ecr_type(self):
@@ -277,30 +364,45 @@ class Analyst:
 
     def handle_allocate(self, x):
         # x := allocate()
-        ecr_x = self.ecr(x)
+        ecr_x = self._find(x)
         type_x = self.nodes[ecr_x]
-        tau = self.get_tau(type_x)
+        tau = self._find(self.get_tau(type_x))
 
         if self.nodes[tau].is_bottom:
             self.settype(tau, self.make_ecr_type())
 
     def handle_store(self, x, y):
-        ecr_x = self.ecr(x)
-        type_x = self.nodes[ecr_x]
-        tau1 = self.get_tau(type_x)
-
-        ecr_y = self.ecr(y)
-        type_y = self.nodes[ecr_y]
-        tau2 = self.get_tau(type_y)
-        lam2 = type_y.lam
-
-        type_tau1 = self.nodes[tau1]
+        # *x := y
+        find = self._find
+        nodes = self.nodes
+        get_tau = self.get_tau
+
+        ecr_x = find(x)
+        type_x = nodes[ecr_x]
+
+        ecr_y = find(y)
+        type_y = nodes[ecr_y]
+        tau2 = get_tau(type_y)
+
+        if type_x.tau is None:
+            # First store through x: its fresh target takes y's type as is,
+            # and being new it has nothing pending for settype to join
+            type_x.tau = self.fresh_type().uf_id
+            self.assign_type(type_x.tau, type_y)
+            # x itself may have been bottom though
+            if type_x.lam is None:
+                self.join_pending(type_x)
+            return
+
+        tau1 = find(type_x.tau)
+        type_tau1 = nodes[tau1]
 
         if type_tau1.is_bottom:
             self.settype(tau1, type_y)
         else:
-            tau3 = self.get_tau(type_tau1)
-            lam3 = type_tau1.lam
+            tau3 = get_tau(type_tau1)
+            lam2 = self.get_lam(type_y)
+            lam3 = self.get_lam(type_tau1)
             if tau2 != tau3:
                 self.cjoin(tau3, tau2)
             if lam2 != lam3:
@@ -310,127 +412,148 @@ class Analyst:
     def get_lam(self, type_):
         if type_.lam is None:  # if x has no lambda value
             type_.lam = self.fresh_type().uf_id
+            if type_.tau is None:
+                self.join_pending(type_)
         return type_.lam
 
+    # Helper function for getting the lambda references of two types about to
+    # be joined. A missing lambda is only created when the other type has
+    # one; when both are missing there is nothing to unify and none is made.
+    # Not for cjoin: the two types stay apart there, and a lambda one of them
+    # gets later must still flow, so both lambdas are needed up front.
+    def get_lams(self, type_1, type_2):
+        if type_1.lam is None and type_2.lam is None:
+            return None, None
+        return self.get_lam(type_1), self.get_lam(type_2)
+
     def get_alpha(self, e):
         if e not in self.nodes:
             self.new_type(e)
         return e
 
+    # args and rets are tuples of UF IDs
     def make_lam_type(self, args, rets):
         type_ = TypeNode("_")
-        type_.lam_args = args
-        type_.lam_rets = rets
+        type_.lam_args = tuple(args)
+        type_.lam_rets = tuple(rets)
         return type_
 
     # Must create alpha nodes, then refer to them by ECR
     def handle_fun_def(self, x, f, r):
-        ecr_x = self.ecr(x)
+        ecr_x = self._find(x)
         type_x = self.nodes[ecr_x]
 
-        lam = self.get_lam(type_x)
+        lam = self._find(self.get_lam(type_x))
         type_lam = self.nodes[lam]  # This requires lam to be added to nodes
 
         if type_lam.is_bottom:
-            alpha_f = []
-            alpha_r = []
-
-            for f_i in f:
-                alpha_f_i = self.get_alpha(f_i)
-                alpha_f.append(alpha_f_i)
-
-            for r_i in r:
-                alpha_r_i = self.get_alpha(r_i)
-                alpha_r.append(alpha_r_i)
+            alpha_f = tuple(self.get_alpha(f_i) for f_i in f)
+            alpha_r = tuple(self.get_alpha(r_i) for r_i in r)
 
             self.settype(lam, self.make_lam_type(alpha_f, alpha_r))
 
         else:
-
-            for i in range(len(f)):
-                alpha_i = type_lam.lam_args[i]
-                tau1 = self.get_tau(alpha_i)
-                lam1 = self.get_lam(alpha_i)
-
-                ecr_f_i = self.ecr(f[i])
-                type_f_i = self.nodes[ecr_f_i]
-                tau2 = self.get_tau(type_f_i)
-                lam2 = self.get_lam(type_f_i)
+            find = self._find
+            nodes = self.nodes
+            get_tau = self.get_tau
+            get_lam = self.get_lam
+            join = self.join
+            lam_args = type_lam.lam_args
+            lam_rets = type_lam.lam_rets
+
+            # A redefinition may have other numbers of parameters or returns.
+            # Only the positions both have are unified, the rest are ignored
+            for i in range(min(len(f), len(lam_args))):
+                type_alpha_i = nodes[find(lam_args[i])]
+                tau1 = get_tau(type_alpha_i)
+                lam1 = get_lam(type_alpha_i)
+
+                ecr_f_i = find(f[i])
+                type_f_i = nodes[ecr_f_i]
+                tau2 = get_tau(type_f_i)
+                lam2 = get_lam(type_f_i)
 
                 # Note distinct order below
                 if tau1 != tau2:
-                    self.join(tau2, tau1)
+                    join(tau2, tau1)
 
                 if lam1 != lam2:
-                    self.join(lam2, lam1)
+                    join(lam2, lam1)
 
-            for i in range(len(r)):
-                alpha_i = type_lam.lam_rets[i]
-                tau1 = self.get_tau(alpha_i)
-                lam1 = self.get_lam(alpha_i)
+            for i in range(min(len(r), len(lam_rets))):
+                type_alpha_i = nodes[find(lam_rets[i])]
+                tau1 = get_tau(type_alpha_i)
+                lam1 = get_lam(type_alpha_i)
 
-                ecr_r_i = self.ecr(r[i])
-                type_r_i = self.nodes[ecr_r_i]
-                tau2 = self.get_tau(type_r_i)
-                lam2 = self.get_lam(type_r_i)
+                ecr_r_i = find(r[i])
+                type_r_i = nodes[ecr_r_i]
+                tau2 = get_tau(type_r_i)
+                lam2 = get_lam(type_r_i)
 
                 # Note distinct order above
                 if tau1 != tau2:
-                    self.join(tau1, tau2)
+                    join(tau1, tau2)
 
                 if lam1 != lam2:
-                    self.join(lam1, lam2)
+                    join(lam1, lam2)
 
     def handle_fun_app(self, x, p, y):
-        ecr_p = self.ecr(p)
+        ecr_p = self._find(p)
         type_p = self.nodes[ecr_p]
 
-        lam = self.get_lam(type_p)
+        lam = self._find(self.get_lam(type_p))
         type_lam = self.nodes[lam]
 
         if type_lam.is_bottom:
-            alpha_args = []
-            alpha_rets = []
-
-            for i in y:
-                alpha_i = self.make_ecr_type().uf_id
-                alpha_args.append(alpha_i)
-
-            for i in x:
-                alpha_i = self.make_ecr_type().uf_id
-                alpha_rets.append(alpha_i)
-
+            # p has no function type yet, give it one with fresh alphas
+            alpha_args = self.fresh_types(len(y))
+            alpha_rets = self.fresh_types(len(x))
+            self.settype(lam, self.make_lam_type(alpha_args, alpha_rets))
+            type_lam = self.node_for(lam)
+
+        find = self._find
+        nodes = self.nodes
+        get_tau = self.get_tau
+        get_lam = self.get_lam
+        cjoin = self.cjoin
         lam_args = type_lam.lam_args
         lam_rets = type_lam.lam_rets
 
-        for i in range(len(lam_args)):
-            alpha_i = lam_args[i]
-            tau1 = self.get_tau(self.nodes[alpha_i])
-            lam1 = self.get_lam(self.nodes[alpha_i])
+        # A call may pass other numbers of arguments or take other numbers of
+        # results than p has (e.g. z := f(y) keeps only the first return).
+        # Only the positions both sides have are unified
+        for i in range(min(len(y), len(lam_args))):
+            # Constant arguments carry no pointers
+            if y[i] not in nodes:
+                continue
+
+            type_alpha_i = nodes[find(lam_args[i])]
+            tau1 = get_tau(type_alpha_i)
+            lam1 = get_lam(type_alpha_i)
 
-            ecr_y_i = self.ecr(y[i])
-            type_y_i = self.nodes[ecr_y_i]
-            tau2 = self.get_tau(type_y_i)
-            lam2 = self.get_lam(type_y_i)
+            ecr_y_i = find(y[i])
+            type_y_i = nodes[ecr_y_i]
+            tau2 = get_tau(type_y_i)
+            lam2 = get_lam(type_y_i)
 
             if tau1 != tau2:
-                self.cjoin(tau1, tau2)
+                cjoin(tau1, tau2)
 
             if lam1 != lam2:
-                self.cjoin(lam1, lam2)
+                cjoin(lam1, lam2)
 
-        for i in range(len(lam_rets)):
-            alpha_i = lam_args[i]
-            tau1 = self.get_tau(self.nodes[alpha_i])
-            lam1 = self.get_lam(self.nodes[alpha_i])
+        for i in range(min(len(x), len(lam_rets))):
+            type_alpha_i = nodes[find(lam_rets[i])]
+            tau1 = get_tau(type_alpha_i)
+            lam1 = get_lam(type_alpha_i)
 
-            ecr_x_i = self.ecr(x[i])
-            type_x_i = self.nodes[ecr_x_i]
-            tau2 = self.get_tau(type_x_i)
-            lam2 = self.get_lam(type_x_i)
+            ecr_x_i = find(x[i])
+            type_x_i = nodes[ecr_x_i]
+            tau2 = get_tau(type_x_i)
+            lam2 = get_lam(type_x_i)
 
             if tau1 != tau2:
-                self.cjoin(tau2, tau1)
+                cjoin(tau2, tau1)
 
             if lam1 != lam2:
-                self.cjoin(lam2, lam1)
+                cjoin(lam2, lam1)
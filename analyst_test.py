@@ -0,0 +1,83 @@
+"""
+Unit tests for the Analyst class.
+"""
+
+import unittest
+from analyst import Analyst
+
+
+class AnalystTest(unittest.TestCase):
+
+    def test_new_types(self):
+        analyst = Analyst()
+        analyst.new_types(["x", "y"])
+        analyst.handle_addr_of("x", "y")
+        node_x = analyst.nodes["x"]
+
+        analyst.new_types(["x", "z"])  # Existing items should keep their type
+        self.assertIs(analyst.nodes["x"], node_x)
+        self.assertEqual(analyst.ecr(node_x.tau), analyst.ecr("y"))
+        self.assertIn("z", analyst.nodes)
+
+    def test_pending_joined_on_new_tau(self):
+        analyst = Analyst()
+        analyst.new_types(["a", "c", "g"])
+        analyst.handle_assign("g", "a")
+        analyst.handle_addr_of("a", "c")
+        # c is still bottom here, so g := a is pending on it
+        analyst.handle_allocate("c")
+        tau_a = analyst.ecr(analyst.node_for("a").tau)
+        tau_g = analyst.ecr(analyst.node_for("g").tau)
+        self.assertEqual(tau_g, tau_a)
+
+    def test_fun_app_uses_definition(self):
+        analyst = Analyst()
+        analyst.new_types(["f", "f_a", "f_r", "y", "z"])
+        analyst.handle_addr_of("f_r", "f_a")
+        analyst.handle_fun_def("f", ["f_a"], ["f_r"])
+        analyst.handle_allocate("y")
+        analyst.handle_fun_app(["z"], "f", ["y"])
+        # z := f(y) gets what f returns, a pointer to f_a
+        tau_z = analyst.ecr(analyst.node_for("z").tau)
+        self.assertEqual(tau_z, analyst.ecr("f_a"))
+        # and y, which points to allocated memory, flows into f_a
+        tau_y = analyst.ecr(analyst.node_for("y").tau)
+        self.assertEqual(analyst.ecr(analyst.node_for("f_a").tau), tau_y)
+
+    def test_fun_app_arity(self):
+        analyst = Analyst()
+        analyst.new_types(["f", "f_a", "f_b", "f_r", "f_s", "y", "z"])
+        analyst.handle_addr_of("f_r", "f_a")
+        analyst.handle_fun_def("f", ["f_a", "f_b"], ["f_r", "f_s"])
+        # Fewer arguments and results than f has: the first ones still link
+        analyst.handle_fun_app(["z"], "f", ["y"])
+        tau_z = analyst.ecr(analyst.node_for("z").tau)
+        self.assertEqual(tau_z, analyst.ecr("f_a"))
+        # More arguments than f has, and a redefinition with fewer
+        analyst.handle_fun_app(["z"], "f", ["y", "y", "y"])
+        analyst.handle_fun_def("f", ["f_a"], ["f_r"])
+
+    def test_fun_app_through_variable(self):
+        # g := f; z := g(y) reaches f's definition, whichever comes first
+        for define_first in (True, False):
+            analyst = Analyst()
+            analyst.new_types(["f", "f_a", "f_r", "g", "x", "y", "z"])
+            if define_first:
+                analyst.handle_addr_of("f_r", "f_a")
+                analyst.handle_fun_def("f", ["f_a"], ["f_r"])
+            analyst.handle_assign("g", "f")
+            analyst.handle_addr_of("y", "x")
+            analyst.handle_fun_app(["z"], "g", ["y"])
+            if not define_first:
+                analyst.handle_addr_of("f_r", "f_a")
+                analyst.handle_fun_def("f", ["f_a"], ["f_r"])
+
+            lam_f = analyst.ecr(analyst.node_for("f").lam)
+            lam_g = analyst.ecr(analyst.node_for("g").lam)
+            self.assertEqual(lam_g, lam_f)
+            tau_z = analyst.ecr(analyst.node_for("z").tau)
+            self.assertEqual(tau_z, analyst.ecr("f_a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,9 +5,11 @@ def main():
 
     filename = f"tests/{z}_assign_test.sil"
 
+    # Build the whole program first and write it out in one call
+    lines = [f"x{i} := y{i};\n" for i in range(1, z + 1)]
+
     with open(filename, "w") as f:
-        for i in range(1, z + 1):
-            f.write(f"x{i} := y{i};\n")
+        f.write("".join(lines))
 
     print(f"Wrote {filename}")
 
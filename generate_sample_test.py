@@ -5,14 +5,20 @@ def main():
 
     filename = f"tests/{z * 5}_sample_test.sil"
 
+    # Build the whole program first and write it out in one call
+    lines = []
+    for i in range(1, z + 1):
+        lines.append(
+            f"p{i} := &x{i};\n"
+            f"r{i} := &p{i};\n"
+            f"q{i} := &y{i};\n"
+            f"s{i} := &q{i};\n"
+            f"r{i} := s{i};\n"
+            "\n"
+        )
+
     with open(filename, "w") as f:
-        for i in range(1, z + 1):
-            f.write(f"p{i} := &x{i};\n")
-            f.write(f"r{i} := &p{i};\n")
-            f.write(f"q{i} := &y{i};\n")
-            f.write(f"s{i} := &q{i};\n")
-            f.write(f"r{i} := s{i};\n")
-            f.write("\n")
+        f.write("".join(lines))
 
     print(f"Wrote {filename}")
 
@@ -12,8 +12,17 @@ def plot_constraints_vs_runtime():
     if len(constraints) != len(runtime):
         raise ValueError("Bad data input")
 
+    constraints = np.asarray(constraints, dtype=np.float64)
+    runtime = np.asarray(runtime, dtype=np.float64)
+
+    # Least-squares line, to show how close to linear the runtime is
+    slope, intercept = np.polyfit(constraints, runtime, 1)
+
     plt.figure()
-    plt.plot(constraints, runtime, marker='o')
+    plt.plot(constraints, runtime, marker='o', label="measured")
+    plt.plot(constraints, slope * constraints + intercept, '--',
+             label=f"fit: {slope:.2e}·n + {intercept:.2f}")
+    plt.legend()
     plt.xlabel("Number of Constraints")
     plt.ylabel("Runtime in Seconds")
     plt.title("Number of Constraints vs. Runtime for Test Program #2")
@@ -23,18 +23,31 @@ def create_sil_parser():
     # 1. Basic Tokens & Types
     # ==========================================
 
-    # Identifiers for variable names: x, y, z, f, p etc
-    identifier = pp.Word(pp.alphas, pp.alphanums + "_")
+    # Identifiers for variable names: x, y, z, f, p etc (keywords excluded)
+    # Names are interned, so the many dict and set lookups keyed on them
+    # later can compare by identity
+    identifier_re = (
+        r"(?!(?:skip|if|then|else|while|fun|add|negate|multiply|allocate)\b)"
+        r"[A-Za-z][A-Za-z0-9_]*"
+    )
+    identifier = pp.Regex(identifier_re).setParseAction(
+        lambda tokens: sys.intern(tokens[0])
+    )
 
-    # Integers
-    number = pp.Word(pp.nums) | pp.Word(pp.nums + ".")
+    # Integers and decimals, as a single regex rather than two alternatives
+    number_re = r"\d+(?:\.\d*)?|\.\d+"
+    number = pp.Regex(number_re)
 
     operand = identifier | number
 
-    # Punctuation
-    lpar, rpar = pp.Literal("("), pp.Literal(")")
-    l_brace, r_brace = pp.Literal("{"), pp.Literal("}")
-    assign = pp.Literal(":=")
+    # Punctuation. Suppressed, so the parse actions only see the names,
+    # keywords and operands of a statement
+    lpar, rpar = pp.Suppress("("), pp.Suppress(")")
+    l_brace, r_brace = pp.Suppress("{"), pp.Suppress("}")
+    assign = pp.Suppress(":=")
+    ampersand = pp.Suppress("&")
+    star = pp.Suppress("*")
+    arrow = pp.Suppress("->")
     semicolon = pp.Literal(";").suppress()
 
     # Keywords
@@ -45,7 +58,8 @@ def create_sil_parser():
     while_kw = pp.Keyword("while")
     fun_kw = pp.Keyword("fun")
 
-    op_kw = pp.Keyword("add") | pp.Keyword("negate") | pp.Keyword("multiply")
+    # One keyword-bounded regex instead of three Keyword alternatives
+    op_kw = pp.oneOf("add negate multiply", asKeyword=True)
 
     # Comments. Allows for 1-line comments starting with # (ignored when parsing)
     comment = (pp.Literal("#") + pp.SkipTo(pp.lineEnd)).suppress()
@@ -56,37 +70,45 @@ def create_sil_parser():
     def cmd_assign(tokens):
         # x := y
         lhs = tokens[0]
-        rhs = tokens[2]
+        rhs = tokens[1]
         return {"type": "assign", "lhs": lhs, "rhs": rhs}
 
     def cmd_addr_of(tokens):
         # x := &y
         lhs = tokens[0]
-        rhs = tokens[3]
+        rhs = tokens[1]
         return {"type": "addr_of", "lhs": lhs, "rhs": rhs}
 
     def cmd_deref(tokens):
         # x := *y
         lhs = tokens[0]
-        rhs = tokens[3]
+        rhs = tokens[1]
         return {"type": "deref", "lhs": lhs, "rhs": rhs}
 
     def cmd_store(tokens):
         # *x := y
-        lhs = tokens[1]
-        rhs = tokens[3]
+        lhs = tokens[0]
+        rhs = tokens[1]
         return {"type": "store", "lhs": lhs, "rhs": rhs}
 
+    simple_types = {"": "assign", "&": "addr_of", "*": "deref"}
+
+    def cmd_simple(tokens):
+        # x := y, x := &y or x := *y, matched by a single regex
+        return {
+            "type": simple_types[tokens["kind"]],
+            "lhs": sys.intern(tokens["lhs"]),
+            "rhs": sys.intern(tokens["rhs"]),
+        }
+
     def cmd_op(tokens):
         # x := op(...)
         lhs = tokens[0]
-        operation = tokens[2]
-        operands = tokens[4:-1]
-        operand_variables = list()
-        for operand in operands:
-            # Only add if it's an identifier (not a number)
-            if is_identifier(operand):
-                operand_variables.append(operand)
+        operation = tokens[1]
+        operands = tokens[2:]
+        # Only keep identifiers (not numbers). Operand tokens are always
+        # non-empty strings, so checking the first character is enough
+        operand_variables = [operand for operand in operands if operand[0].isalpha()]
 
         return {
             "type": "op",
@@ -102,28 +124,33 @@ def create_sil_parser():
         return {"type": "allocate", "lhs": lhs}
 
     def add_scope(statements, scope_prefix):
-        # Recursively rescope the variables in the statements list
-        for stmt in statements:
-            if "lhs" in stmt:
-                stmt["lhs"] = scope_prefix + "_" + stmt["lhs"]
-            if "rhs" in stmt:
-                stmt["rhs"] = scope_prefix + "_" + stmt["rhs"]
-            if "operand_variables" in stmt:
-                for i, operand in enumerate(stmt["operand_variables"]):
-                    stmt["operand_variables"][i] = scope_prefix + "_" + operand
-            if "body" in stmt:
-                # Recurse into nested block bodies and keep the modified list
-                stmt["body"] = add_scope(stmt["body"], scope_prefix)
+        # Rescope the variables in the statements list and in nested block
+        # bodies, using a stack of statement lists instead of recursion
+        prefix = scope_prefix + "_"
+        stack = [statements]
+        while stack:
+            for stmt in stack.pop():
+                if "lhs" in stmt:
+                    stmt["lhs"] = sys.intern(prefix + stmt["lhs"])
+                if "rhs" in stmt:
+                    stmt["rhs"] = sys.intern(prefix + stmt["rhs"])
+                if "operand_variables" in stmt:
+                    operand_variables = stmt["operand_variables"]
+                    for i, operand in enumerate(operand_variables):
+                        operand_variables[i] = sys.intern(prefix + operand)
+                if "body" in stmt:
+                    stack.append(stmt["body"])
         # Return the modified statements so callers can assign the result
         return statements
 
     def cmd_fun_def(tokens):
         lhs = tokens["fun_name"]
         params = tokens["params"].asList()
-        params_scope = [lhs + "_" + element for element in params]
+        prefix = lhs + "_"
+        params_scope = [sys.intern(prefix + element) for element in params]
         returns = tokens["returns"].asList()
-        returns_scope = [lhs + "_" + element for element in returns]
-        body = tokens["body"].asList()[1:-1]  # remove braces
+        returns_scope = [sys.intern(prefix + element) for element in returns]
+        body = tokens["body"].asList()
 
         # rescope the variables in the body
         add_scope(body, lhs)
@@ -141,11 +168,8 @@ def create_sil_parser():
         lhs = tokens["lhs"]
         fun_name = tokens["fun_name"]
         args = tokens["args"].asList()
-        arg_variables = list()
-        for arg in args:
-            # Only add if it's an identifier (not a number)
-            if is_identifier(arg):
-                arg_variables.append(arg)
+        # Only keep identifiers (not numbers), as in cmd_op
+        arg_variables = [arg for arg in args if arg[0].isalpha()]
 
         return {
             "type": "fun_app",
@@ -177,17 +201,13 @@ def create_sil_parser():
         identifier + assign + pp.Keyword("allocate") + lpar + operand + rpar
     ).setParseAction(cmd_allocate)
     # x := &y
-    addr_of_stmt = (identifier + assign + pp.Literal("&") + operand).setParseAction(
+    addr_of_stmt = (identifier + assign + ampersand + operand).setParseAction(
         cmd_addr_of
     )
     # x := *y
-    deref_stmt = (identifier + assign + pp.Literal("*") + operand).setParseAction(
-        cmd_deref
-    )
+    deref_stmt = (identifier + assign + star + operand).setParseAction(cmd_deref)
     # *x := y
-    store_stmt = (pp.Literal("*") + identifier + assign + operand).setParseAction(
-        cmd_store
-    )
+    store_stmt = (star + identifier + assign + operand).setParseAction(cmd_store)
     # x := fun(f1…fn) → (r1…rm) {S*}
     fun_def_stmt = (
         identifier.setResultsName("fun_name")
@@ -196,7 +216,7 @@ def create_sil_parser():
         + lpar
         + pp.delimitedList(identifier).setResultsName("params")
         + rpar
-        + pp.Literal("->")
+        + arrow
         + lpar
         + pp.delimitedList(identifier).setResultsName("returns")
         + rpar
@@ -216,12 +236,26 @@ def create_sil_parser():
     # x := y
     assign_stmt = (identifier + assign + operand).setParseAction(cmd_assign)
 
+    # x := y, x := &y and x := *y, the most common statements, in one regex
+    # rather than three sequences of tokens. The lookahead for ';' keeps it
+    # from matching the start of an op, allocate or function statement
+    simple_stmt = pp.Regex(
+        rf"(?P<lhs>{identifier_re})\s*:=\s*(?P<kind>[&*]?)\s*"
+        rf"(?P<rhs>{identifier_re}|{number_re})(?=\s*;)"
+    ).setParseAction(cmd_simple)
+
+    # Alternatives are tried in order. The common statements go first, and
+    # they fail on their first or third token. The token-by-token forms of
+    # simple_stmt stay as a fallback. op, allocate and fun_def must come
+    # before fun_app, and assign_stmt last, since the later ones also match
+    # a prefix of the earlier ones
     assignment = (
-        op_stmt
-        | allocate_stmt
+        simple_stmt
+        | store_stmt
         | addr_of_stmt
         | deref_stmt
-        | store_stmt
+        | op_stmt
+        | allocate_stmt
         | fun_def_stmt
         | fun_app
         | assign_stmt
@@ -243,15 +277,15 @@ def create_sil_parser():
     ).setParseAction(
         lambda tokens: {
             "type": "if",
-            "then": tokens["then"].asList()[1:-1],
-            "else": tokens["else"].asList()[1:-1],
+            "then": tokens["then"].asList(),
+            "else": tokens["else"].asList(),
         },
     )
 
     while_stmt = (
         while_kw + lpar + pp.SkipTo(rpar) + rpar + block("body")
     ).setParseAction(
-        lambda tokens: {"type": "while", "body": tokens["body"].asList()[1:-1]},
+        lambda tokens: {"type": "while", "body": tokens["body"].asList()},
     )
 
     statement <<= (if_stmt | while_stmt | skip_stmt | assignment) + semicolon | comment
@@ -260,38 +294,23 @@ def create_sil_parser():
     return program
 
 
-def is_identifier(value):
-    """Check if a value is an identifier (string starting with a letter)."""
-    return isinstance(value, str) and value[0].isalpha()
+# The grammar only needs to be built once per process
+_PARSER = None
+
+
+def get_sil_parser():
+    """Return the SIL parser, building it on first use."""
+    global _PARSER
+    if _PARSER is None:
+        _PARSER = create_sil_parser()
+    return _PARSER
 
 
 # After we have the AST, we can traverse it to get all the relevant constraints
 # to do Steensgaard's analysis. This means ignoring control flow statements, and
 # skip statements, but getting the constraints inside their blocks.
 def get_all_constraints(ast):
-    constraints = []
-    for stmt in ast:
-        if stmt["type"] == "if":
-            constraints = (
-                constraints
-                + get_all_constraints(stmt["then"])
-                + get_all_constraints(stmt["else"])
-            )
-        elif stmt["type"] == "while":
-            constraints = constraints + get_all_constraints(stmt["body"])
-        elif stmt["type"] == "fun_def":
-            constraints = constraints + get_all_constraints(stmt["body"])
-            constraints.append(stmt)
-        elif stmt["type"] == "skip":
-            continue
-        else:
-            if "rhs" in stmt and is_identifier(stmt["rhs"]):
-                constraints.append(stmt)
-            elif not ("rhs" in stmt):
-                constraints.append(stmt)
-            else:
-                continue
-    return constraints
+    return get_constraints_and_variables(ast)[0]
 
 
 def get_all_variables(ast):
@@ -301,54 +320,56 @@ def get_all_variables(ast):
     Returns:
         set: A set containing all variable names found in the program.
     """
+    return get_constraints_and_variables(ast)[1]
+
+
+def get_constraints_and_variables(ast):
+    """
+    Traverse the AST once, collecting both the constraints and the variables.
+
+    Returns:
+        list: The constraints relevant to Steensgaard's analysis, in order.
+        set: A set containing all variable names found in the program.
+    """
+    constraints = []
     variables = set()
 
-    def extract_variables_from_stmt(stmt):
-        """Helper function to extract variables from a single statement."""
-        if stmt["type"] == "if":
-            extract_variables_from_stmt_list(stmt["then"])
-            extract_variables_from_stmt_list(stmt["else"])
-        elif stmt["type"] == "while":
-            extract_variables_from_stmt_list(stmt["body"])
-        elif stmt["type"] == "fun_def":
-            # Add function name, params, and returns
-            variables.add(stmt["lhs"])
-            for param in stmt["params"]:
-                variables.add(param)
-            for ret in stmt["returns"]:
-                variables.add(ret)
-            extract_variables_from_stmt_list(stmt["body"])
-        elif stmt["type"] == "fun_app":
-            variables.add(stmt["lhs"])
-            variables.add(stmt["fun_name"])
-            for arg in stmt["arg_variables"]:
-                variables.add(arg)
-        elif stmt["type"] == "skip":
-            pass
-        else:
-            # Handle assignment-like statements
-            if "lhs" in stmt:
+    def extract_from_stmt_list(stmt_list):
+        """Helper function to extract from a list of statements."""
+        for stmt in stmt_list:
+            if stmt["type"] == "if":
+                extract_from_stmt_list(stmt["then"])
+                extract_from_stmt_list(stmt["else"])
+            elif stmt["type"] == "while":
+                extract_from_stmt_list(stmt["body"])
+            elif stmt["type"] == "fun_def":
+                # Add function name, params, and returns
+                variables.add(stmt["lhs"])
+                variables.update(stmt["params"])
+                variables.update(stmt["returns"])
+                extract_from_stmt_list(stmt["body"])
+                constraints.append(stmt)
+            elif stmt["type"] == "fun_app":
                 variables.add(stmt["lhs"])
-            if "rhs" in stmt:
-                if is_identifier(stmt["rhs"]):
-                    variables.add(stmt["rhs"])
-            if "operands" in stmt:
-                for operand in stmt["operand_variables"]:
-                    # Only add if it's an identifier (not a number)
-                    variables.add(operand)
-            if "fun_name" in stmt:
                 variables.add(stmt["fun_name"])
-            if "args" in stmt:
-                for arg in stmt["arg_variables"]:
-                    variables.add(arg)
-
-    def extract_variables_from_stmt_list(stmt_list):
-        """Helper function to extract variables from a list of statements."""
-        for stmt in stmt_list:
-            extract_variables_from_stmt(stmt)
+                variables.update(stmt["arg_variables"])
+                constraints.append(stmt)
+            elif stmt["type"] == "skip":
+                continue
+            else:
+                # Handle assignment-like statements
+                if "lhs" in stmt:
+                    variables.add(stmt["lhs"])
+                if "operand_variables" in stmt:
+                    variables.update(stmt["operand_variables"])
+                if "rhs" not in stmt:
+                    constraints.append(stmt)
+                elif stmt["rhs"][0].isalpha():  # a variable, not a number
+                    variables.add(stmt["rhs"])
+                    constraints.append(stmt)
 
-    extract_variables_from_stmt_list(ast)
-    return variables
+    extract_from_stmt_list(ast)
+    return constraints, variables
 
 
 def main(args=None):
@@ -376,11 +397,11 @@ def main(args=None):
     with open(program_fn, "r") as f:
         program = f.read()
 
-    parser = create_sil_parser()
+    parser = get_sil_parser()
 
     try:
         # 1. Parse the code
-        ast = parser.parse_string(program)
+        ast = parser.parse_string(program, parse_all=True)
 
         print("List of statement types and parsed information")
 
@@ -392,12 +413,11 @@ def main(args=None):
             logic = str(c)
             print(f"{ctype:<15} | {logic}")
 
-        all_constraints = get_all_constraints(ast)
+        all_constraints, all_variables = get_constraints_and_variables(ast)
         print("\nList of all extracted constraints:")
         for constraint in all_constraints:
             print(constraint)
 
-        all_variables = get_all_variables(ast)
         print(f"\nAll variable names encountered: {sorted(all_variables)}")
 
     except pp.ParseException as e:
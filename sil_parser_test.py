@@ -0,0 +1,71 @@
+"""
+Unit tests for the SIL parser.
+"""
+
+import unittest
+import pyparsing as pp
+from sil_parser import get_sil_parser, get_constraints_and_variables
+
+
+def parse(program):
+    ast = get_sil_parser().parse_string(program, parse_all=True)
+    return get_constraints_and_variables(ast)
+
+
+class SilParserTest(unittest.TestCase):
+
+    def test_simple_statements(self):
+        constraints, variables = parse("x := y; p := &q; r := *p; *r := x;")
+        self.assertEqual(
+            constraints,
+            [
+                {"type": "assign", "lhs": "x", "rhs": "y"},
+                {"type": "addr_of", "lhs": "p", "rhs": "q"},
+                {"type": "deref", "lhs": "r", "rhs": "p"},
+                {"type": "store", "lhs": "r", "rhs": "x"},
+            ],
+        )
+        self.assertEqual(variables, {"p", "q", "r", "x", "y"})
+
+    def test_constant_is_not_a_variable(self):
+        constraints, variables = parse("x := 3;")
+        self.assertEqual(constraints, [])
+        self.assertEqual(variables, {"x"})
+
+    def test_simple_stmt_lookahead(self):
+        # Starts like x := y, but is an op and an allocate
+        constraints, variables = parse("x := add(y, 3); z := allocate(4);")
+        self.assertEqual([c["type"] for c in constraints], ["op", "allocate"])
+        self.assertEqual(constraints[0]["operand_variables"], ["y"])
+        self.assertEqual(variables, {"x", "y", "z"})
+
+    def test_keyword_prefix_identifiers(self):
+        # Names that only start with a keyword are still identifiers
+        constraints, variables = parse("funny := &iffy; whiley := allocate(4);")
+        self.assertEqual(variables, {"funny", "iffy", "whiley"})
+        self.assertEqual(constraints[0], {"type": "addr_of", "lhs": "funny", "rhs": "iffy"})
+
+    def test_keyword_is_not_identifier(self):
+        with self.assertRaises(pp.ParseException):
+            parse("fun := y;")
+
+    def test_control_flow_blocks(self):
+        constraints, variables = parse(
+            "if (x) then {a := &b;} else {skip;}; while (y) {c := d;};"
+        )
+        self.assertEqual(
+            constraints,
+            [
+                {"type": "addr_of", "lhs": "a", "rhs": "b"},
+                {"type": "assign", "lhs": "c", "rhs": "d"},
+            ],
+        )
+
+    def test_parse_all(self):
+        # Text after the last statement is an error, not silently dropped
+        with self.assertRaises(pp.ParseException):
+            parse("x := y; garbage")
+
+
+if __name__ == "__main__":
+    unittest.main()
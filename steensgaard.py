@@ -5,15 +5,14 @@ Course: COS 516
 Authors: Tanvi Namjoshi & Lana Glisic
 """
 
-import networkx as nx
-import matplotlib.pyplot as plt
 import argparse
 import sys
 from sil_parser import *
 from analyst import *
 import time
-import pandas as pd
 import math
+import csv
+import os
 
 
 def parse_program(program: str):
@@ -24,49 +23,76 @@ def parse_program(program: str):
     Returns:
         ast (list): The Abstract Syntax Tree (AST) of the program.
         constraints (list): The list of constraints extracted from the AST.
+        variables (set): All variable names found in the program.
+        None is returned instead if the program does not parse.
     """
-    parser = create_sil_parser()
+    parser = get_sil_parser()
     try:
-        ast = parser.parse_string(program)
-        constraints = get_all_constraints(ast)
-        return ast, constraints
+        # parse_all, so text that is not a statement is an error instead of
+        # silently ending the program there
+        ast = parser.parse_string(program, parse_all=True)
+        constraints, variables = get_constraints_and_variables(ast)
+        return ast, constraints, variables
     except pp.ParseException as e:
         print("Parse Error:", e)
 
 
-def create_graph(uf, map):
-    # Create a new networkx directed graph
-    G = nx.DiGraph()
-    sets = uf.get_sets()  # get the ECR sets
-    for set in sets:
-        G.add_node(
-            tuple(set)
-        )  # each set is a node in the graph (named after all its members)
+def build_edges(uf, map):
+    """
+    Builds the storage shape graph as plain lists, without networkx.
+    Each node is a tuple of the members of one ECR set, and there is an edge
+    from a set to the set its tau points to.
+    Returns:
+        nodes (list): One tuple per ECR set.
+        edges (list): (start, end) pairs of nodes.
+    """
+    nodes = []
+    set_of = {}  # maps each UF ID to the graph node of its set
+    for set in uf.get_sets():  # get the ECR sets
+        set_node = tuple(set)  # each set is named after all its members
+        nodes.append(set_node)
+        for member in set:
+            set_of[member] = set_node
+    edges = []
     for key, node in map.items():
         if node.tau is None:
             continue  # skip if tau is None (no points-to relation)
         else:
-            # Find the set that contains node.uf_id for start and end
-            start = "start"
-            end = "end"
-            end_node = node.tau
-            for set in sets:
-                if end_node in set:
-                    end = tuple(set)
-                if node.uf_id in set:
-                    start = tuple(set)
-            G.add_edge(start, end)  # add directed edge from start to end
+            # Look up the sets that contain node.uf_id and node.tau
+            start = set_of.get(node.uf_id, "start")
+            end = set_of.get(node.tau, "end")
+            edges.append((start, end))
+    return nodes, edges
+
 
+def edges_to_graph(nodes, edges):
+    # networkx and matplotlib are imported where they are used, so parsing
+    # and analysis alone do not pay for loading them
+    import networkx as nx
+
+    # Create a new networkx directed graph
+    G = nx.DiGraph()
+    G.add_nodes_from(nodes)
+    G.add_edges_from(edges)
     return G
 
 
-def draw_single_graph(filename, uf, map):
+def create_graph(uf, map):
+    return edges_to_graph(*build_edges(uf, map))
+
+
+def draw_single_graph(filename, uf, map, show=False):
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
     G = create_graph(uf, map)
     # Draw the graph
-    plt.figure()
+    fig = plt.figure()
     plt.title(f"Storage Shape Graph for SIL Program: {filename}")
 
-    pos = nx.planar_layout(G)
+    # Spring layout works for any graph, planar_layout raises on non-planar
+    # ones. Seeded so the same program always gives the same picture
+    pos = nx.spring_layout(G, seed=42)
     nx.draw(
         G,
         pos,
@@ -77,10 +103,65 @@ def draw_single_graph(filename, uf, map):
         arrowsize=25,
     )
     plt.savefig(f"{filename}_graph.png")  # Save the graph as a PNG file
-    plt.show()  # Show the graph, needs to be closed manually for program to continue
+    if show:
+        plt.show()  # Show the graph, needs to be closed manually for program to continue
+    plt.close(fig)
     return G
 
 
+def draw_graph_progression(filename, graphs):
+    """
+    Draws a grid with one subplot per recorded graph and saves it as a PNG.
+    Args:
+        filename (str): Name of the SIL program, used for the output file.
+        graphs (list): (title, nodes, edges) triples from build_edges, in the
+            order they were recorded.
+    """
+    import matplotlib.pyplot as plt
+    import networkx as nx
+
+    # Smallest square-ish grid that fits every graph, in integer arithmetic
+    n_graphs = len(graphs)
+    cols = math.isqrt(n_graphs)
+    if cols * cols < n_graphs:
+        cols += 1
+    rows = -(-n_graphs // cols)
+    fig = plt.figure(figsize=(cols * 4, rows * 3))
+
+    # Lay out the union of all the graphs once, instead of once per graph.
+    # A class keeps the same position until it is merged into another, so
+    # the pictures line up from one step to the next
+    union = nx.DiGraph()
+    for _, nodes, edges in graphs:
+        union.add_nodes_from(nodes)
+        union.add_edges_from(edges)
+    pos = nx.spring_layout(union, seed=42)
+
+    # Only create the axes that get a graph, instead of hiding the unused ones
+    for i, (title, nodes, edges) in enumerate(graphs):
+        G = edges_to_graph(nodes, edges)
+        ax = fig.add_subplot(rows, cols, i + 1)
+        nx.draw(
+            G,
+            pos,
+            with_labels=True,
+            node_color="lightblue",
+            font_weight="bold",
+            font_size=8,
+            node_size=300,
+            arrowsize=10,
+            ax=ax,
+        )
+        ax.set_title(title)
+        ax.set_axis_on()  # nx.draw turns the axis off
+
+    output = f"{filename}_allconstraints_graphs.png"
+    fig.suptitle(f"Steensgaard's Analysis Progression: {filename}")
+    fig.tight_layout()
+    fig.savefig(output)
+    plt.close(fig)
+
+
 def get_debugging_types(variables, analyst):
     """
     This function prints the current typing of all variables for debugging.
@@ -101,17 +182,41 @@ def get_typing(variables, analyst):
         variables (set): Set of variable names in the program.
         analyst (Analyst): The Analyst object containing the analysis results.
     """
+    # ECRs looked up so far. Variables in the same class point to the same
+    # TypeNode, so their tau and uf_id are only resolved once per report
+    ecr_of = {}
+
+    def ecr(x):
+        if x not in ecr_of:
+            ecr_of[x] = analyst.ecr(x)
+        return ecr_of[x]
+
     for variable in sorted(variables):  # sort the variables:
-        ecr_v = analyst.ecr(variable)
+        ecr_v = ecr(variable)
         type_var = analyst.nodes[ecr_v]
-        type_tau = analyst.ecr(type_var.tau) if type_var.tau != None else "\u22a5"
+        type_tau = ecr(type_var.tau) if type_var.tau != None else "\u22a5"
         type_lambda = type_var.lam if type_var.lam != None else "\u22a5"
-        print(
-            f"{variable}: {analyst.ecr(type_var.uf_id)} = ref({type_tau}, {type_lambda})"
-        )
+        print(f"{variable}: {ecr(type_var.uf_id)} = ref({type_tau}, {type_lambda})")
+
+
+def constraint_key(c):
+    """
+    Returns a hashable key identifying a simple constraint, so repeated
+    constraints can be recognized. Function definitions and applications
+    carry nested data and return None (they are never treated as repeats).
+    """
+    match c["type"]:
+        case "op":
+            return ("op", c["lhs"], tuple(c["operand_variables"]))
+        case "fun_def" | "fun_app":
+            return None
+        case _:
+            return (c["type"], c.get("lhs"), c.get("rhs"))
 
 
-def run_steensgaard_analysis(filename, variables, constraints, graph_all=False):
+def run_steensgaard_analysis(
+    filename, variables, constraints, graph_all=False, verbose=False
+):
     """
     Runs Steensgaard's Points-to Analysis on the given variables and constraints.
     Args:
@@ -119,6 +224,8 @@ def run_steensgaard_analysis(filename, variables, constraints, graph_all=False):
         constraints (list): List of constraints parsed from the SIL program.
         graph_all (bool): If True, generates graphs after each constraint processing.
             Do not set to true for timing experiments.
+        verbose (bool): If True, prints each constraint and the typing of all
+            variables after it. Do not set to true for timing experiments.
     Returns:
         uf (UnionFind): The union-find structure representing ECRs.
         nodes (dict): Mapping from ECRs to their corresponding TypeNodes.
@@ -126,106 +233,68 @@ def run_steensgaard_analysis(filename, variables, constraints, graph_all=False):
     # Initialize the Analyst
     analyst = Analyst()
 
-    # Initialize Type nodes for all variables
-    for v in variables:
-        analyst.new_type(v)
+    # Initialize Type nodes for all variables in one batch. Sorted, since the
+    # variables come in a set whose order changes from run to run, and the
+    # insertion order shows up in the ECR sets and graph labels
+    analyst.new_types(sorted(variables))
 
-    n_constraints = len(constraints)
+    # Snapshots of the graph after each step. They are only drawn once the
+    # analysis is done, so the layout and drawing stay out of the loop
+    graphs = []
+    if graph_all:
+        graphs.append(("Initial graph", *build_edges(analyst.uf, analyst.nodes)))
 
-    if graph_all and n_constraints > 0:
-        cols = int(math.ceil(math.sqrt(n_constraints + 1)))
-        rows = int(math.ceil((n_constraints + 1) / cols))
-        fig, axs = plt.subplots(rows, cols, figsize=(cols * 4, rows * 3))
-        # Normalize axs to a flat list for easy indexing
-        if isinstance(axs, plt.Axes):
-            axs = [axs]
-        else:
-            axs = list(axs.flatten())
-        # Hide any unused axes
-        for i in range(n_constraints, len(axs)):
-            axs[i].axis("off")
-
-        # draw initial graph
-        G = create_graph(analyst.uf, analyst.nodes)
-        pos = nx.spring_layout(G)
-        ax = axs[0]
-        nx.draw(
-            G,
-            pos,
-            with_labels=True,
-            node_color="lightblue",
-            font_weight="bold",
-            font_size=8,
-            node_size=300,
-            arrowsize=10,
-            ax=ax,
-        )
-        ax.set_title(f"Initial graph")
-        ax.set_axis_on()
+    # Keys of the constraints processed so far. A processed constraint stays
+    # satisfied (a type leaving bottom joins whatever was pending on it), so
+    # processing the same constraint a second time cannot change the solution
+    # and repeats are skipped.
+    seen = set()
 
     # Process each constraint
     for i, c in enumerate(constraints):
-        print("Processing constraint:", c)
+        if verbose:
+            print("Processing constraint:", c)
 
+        key = constraint_key(c)
         match c["type"]:
+            case _ if key in seen:
+                if verbose:
+                    print("Duplicate constraint, skipped.")
             case "assign":
-                print("assign", c["lhs"], c["rhs"])
                 analyst.handle_assign(c["lhs"], c["rhs"])
             case "addr_of":
-                print("addr_of", c["lhs"], c["rhs"])
                 analyst.handle_addr_of(c["lhs"], c["rhs"])
             case "deref":
-                print("deref", c["lhs"], c["rhs"])
                 analyst.handle_deref(c["lhs"], c["rhs"])
             case "op":
-                print("op", c["lhs"], c["operands"])
                 analyst.handle_op(c["lhs"], c["operand_variables"])
             case "allocate":
-                print("allocate", c["lhs"])
                 analyst.handle_allocate(c["lhs"])
             case "store":
-                print("store", c["lhs"], c["rhs"])
                 analyst.handle_store(c["lhs"], c["rhs"])
             case "fun_def":
-                print("fun_def", c["lhs"], c["params"], c["returns"])
                 analyst.handle_fun_def(c["lhs"], c["params"], c["returns"])
             case "fun_app":
-                print("fun_app", c["lhs"], c["fun_name"], c["args"])
-                analyst.handle_fun_def(c["lhs"], c["fun_name"], c["args"])
+                analyst.handle_fun_app([c["lhs"]], c["fun_name"], c["args"])
             case _:
                 print("Unrecognized constraint.")
+        if key is not None:
+            seen.add(key)
 
-        print("Pending:", analyst.pending)  # debugging support
-        get_debugging_types(variables, analyst)  # debugging support
+        if verbose:
+            print("Pending:", analyst.pending)  # debugging support
+            get_debugging_types(variables, analyst)  # debugging support
 
-        # if graph_all, draw the graph after each constraint
+        # if graph_all, record the graph after each constraint
         if graph_all:
-            G = create_graph(analyst.uf, analyst.nodes)
-            pos = nx.planar_layout(G)
-            ax = axs[i + 1]
-            nx.draw(
-                G,
-                pos,
-                with_labels=True,
-                node_color="lightblue",
-                font_weight="bold",
-                font_size=8,
-                node_size=300,
-                arrowsize=10,
-                ax=ax,
-            )
-            ax.set_title(f"After constraint {i + 1}")
-            ax.set_axis_on()
+            nodes, edges = build_edges(analyst.uf, analyst.nodes)
+            graphs.append((f"After constraint {i + 1}", nodes, edges))
 
     print("Final Types:")
     get_typing(variables, analyst)  # get the final types in the format of the paper
 
     if graph_all:
-        output = f"{filename}_allconstraints_graphs.png"
-        fig.suptitle(f"Steensgaard's Analysis Progression: {filename}")
-        fig.tight_layout()
-        fig.savefig(output)
-        plt.close(fig)
+        draw_graph_progression(filename, graphs)
 
     return analyst.uf, analyst.nodes
 
@@ -233,20 +302,14 @@ def run_steensgaard_analysis(filename, variables, constraints, graph_all=False):
 def save_time_analysis(
     n_constraints, n_variables, elapsed_time, filename="steensgaard_times.csv"
 ):
-    # Add new time data points to CSV file
-    df = pd.read_csv(filename)
-    new_row_df = pd.DataFrame(
-        [
-            {
-                "constraints": n_constraints,
-                "variables": n_variables,
-                "time": elapsed_time,
-            }
-        ]
-    )
-    # Concatenate the DataFrames
-    df = pd.concat([df, new_row_df], ignore_index=True)
-    df.to_csv(filename, index=False)
+    # Append the new time data point to the CSV file, writing the header
+    # first if the file does not exist yet
+    write_header = not os.path.exists(filename)
+    with open(filename, "a", newline="") as f:
+        writer = csv.writer(f)
+        if write_header:
+            writer.writerow(["constraints", "variables", "time"])
+        writer.writerow([n_constraints, n_variables, elapsed_time])
 
 
 def main(args=None):
@@ -272,10 +335,35 @@ def main(args=None):
         help="Enable intermediary graph visualizations (default: False)",
     )
 
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Print the typing after every constraint (default: False)",
+    )
+
+    parser.add_argument(
+        "-nd",
+        "--no_draw",
+        action="store_true",
+        help="Skip drawing the final graph, use for timing experiments (default: False)",
+    )
+
     # Parse the arguments
     # If args is None, parse_args will default to sys.argv[1:]
-    program_fn = parser.parse_args(args).filename
-    graph_all = parser.parse_args(args).graph_all
+    ns = parser.parse_args(args)
+    program_fn = ns.filename
+    graph_all = ns.graph_all
+    verbose = ns.verbose
+    no_draw = ns.no_draw
+
+    # The backend is picked once, here. Without the final window nothing is
+    # shown, so --graph_all only needs the non-interactive Agg backend and
+    # no GUI toolkit is loaded. With neither, matplotlib is never imported
+    if no_draw and graph_all:
+        import matplotlib
+
+        matplotlib.use("Agg")
 
     # Access the parsed argument (filename)
     if program_fn:
@@ -283,9 +371,11 @@ def main(args=None):
             program = f.read()
             print(program)
 
-            ast, constraints = parse_program(program)
+            parsed = parse_program(program)
+            if parsed is None:
+                return -1  # the parse error has been printed already
+            ast, constraints, all_variables = parsed
             n = len(constraints)  # number of constraints
-            all_variables = get_all_variables(ast)
             v = len(all_variables)
 
             # Print important information, helpful for debugging
@@ -297,7 +387,11 @@ def main(args=None):
             # Run Steensgaard's analysis, and time it (for performance measurement)
             start_time = time.perf_counter()
             uf, nodes = run_steensgaard_analysis(
-                program_fn, all_variables, constraints, graph_all=graph_all
+                program_fn,
+                all_variables,
+                constraints,
+                graph_all=graph_all,
+                verbose=verbose,
             )
             end_time = time.perf_counter()
             elapsed_time = end_time - start_time
@@ -307,7 +401,8 @@ def main(args=None):
             )
             if not graph_all:
                 save_time_analysis(n, v, elapsed_time)
-            draw_single_graph(program_fn, uf, nodes)  # graph visualization
+            if not no_draw:
+                draw_single_graph(program_fn, uf, nodes, show=True)  # graph visualization
             return 0
     else:
         print("No filename provided.")
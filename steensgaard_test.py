@@ -0,0 +1,37 @@
+"""
+Unit tests for the Steensgaard driver in steensgaard.py.
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+import steensgaard
+
+
+class SteensgaardTest(unittest.TestCase):
+
+    def test_parse_program(self):
+        ast, constraints, variables = steensgaard.parse_program("x := &y;")
+        self.assertEqual(constraints, [{"type": "addr_of", "lhs": "x", "rhs": "y"}])
+        self.assertEqual(variables, {"x", "y"})
+
+    def test_parse_error(self):
+        with contextlib.redirect_stdout(io.StringIO()) as out:
+            self.assertIsNone(steensgaard.parse_program("x := y;\ngarbage"))
+        self.assertIn("Parse Error", out.getvalue())
+
+    def test_main_parse_error(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join(tmp, "bad.sil")
+            with open(filename, "w") as f:
+                f.write("x := y;\ngarbage\n")
+            # Reported as an input error, not a traceback
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                self.assertEqual(steensgaard.main(["-fn", filename, "-nd"]), -1)
+        self.assertIn("Parse Error", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,38 +9,79 @@ Usage (For quick sanity check test):
 class UnionFind:
     """A Union-Find data structure to maintain equivalence classes."""
 
+    # Fixed attribute layout, like TypeNode
+    __slots__ = ("parent", "rank", "_sets")
+
     def __init__(self):
         self.parent = {}
+        # Upper bound on the height of each root's tree, for union-by-rank
+        self.rank = {}
+        # Result of get_sets, kept until the next add or union changes the sets
+        self._sets = None
 
     def add(self, item):
         """Adds a new item as its own parent (new set)."""
         if item not in self.parent:
             self.parent[item] = item
+            self.rank[item] = 0
+            self._sets = None
+
+    def add_all(self, items):
+        """Adds every new item in 'items' as its own parent, in one batch."""
+        parent = self.parent
+        new_items = [item for item in items if item not in parent]
+        parent.update({item: item for item in new_items})
+        self.rank.update({item: 0 for item in new_items})
+        if new_items:
+            self._sets = None
 
     def find(self, item):
         """Finds the top element of the set containing 'item'."""
-        if self.parent[item] == item:
-            return item
-        else:
-            return self.find(self.parent[item])
+        parent = self.parent
+        # Path halving: point every other node on the path at its grandparent
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
 
     def union(self, item1, item2):
-        """Unites the sets containing 'item1' and 'item2'."""
+        """
+        Unites the sets containing 'item1' and 'item2' and returns the root of
+        the merged set. The shallower tree goes under the deeper one (union by
+        rank); on a tie the root of 'item1' is kept.
+        """
         root1 = self.find(item1)
         root2 = self.find(item2)
-        if root1 != root2:
-            self.parent[root2] = root1
+        if root1 == root2:
+            return root1
+        rank = self.rank
+        if rank[root1] < rank[root2]:
+            root1, root2 = root2, root1
+        elif rank[root1] == rank[root2]:
+            rank[root1] += 1
+        self.parent[root2] = root1
+        self._sets = None
         return root1
 
     def get_sets(self):
-        """Returns all sets in the union-find structure."""
-        sets = {}
-        for item in self.parent:
-            root = self.find(item)
-            if root not in sets:
-                sets[root] = []
-            sets[root].append(item)
-        return list(sets.values())
+        """
+        Returns all sets in the union-find structure. The result is cached
+        until the next add or union, so callers should not modify it.
+        Every item is also pointed straight at its root, so later finds (e.g.
+        when reporting after the analysis) take a single step.
+        """
+        if self._sets is None:
+            find = self.find
+            parent = self.parent
+            sets = {}
+            for item in parent:
+                root = find(item)
+                parent[item] = root
+                if root not in sets:
+                    sets[root] = []
+                sets[root].append(item)
+            self._sets = list(sets.values())
+        return self._sets
 
     def __str__(self):
         return str(self.parent)
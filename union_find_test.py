@@ -25,6 +25,19 @@ class UnionFindTest(unittest.TestCase):
         sets = uf.get_sets()
         self.assertEqual(len(sets), 2)
 
+    def test_add_all(self):
+        uf = UnionFind()
+        uf.add("x")
+        uf.add_all(["x", "y", "z"])
+        sets = uf.get_sets()
+        self.assertEqual(len(sets), 3)
+        for s in [["x"], ["y"], ["z"]]:
+            self.assertIn(s, sets)
+
+        uf.union("x", "y")
+        uf.add_all(["y"])  # Adding existing items should not change sets
+        self.assertEqual(uf.find("y"), uf.find("x"))
+
     def test_find(self):
         uf = UnionFind()
         uf.add("a")
@@ -35,6 +48,17 @@ class UnionFindTest(unittest.TestCase):
         uf.union("a", "b")
         self.assertEqual(uf.find("a"), uf.find("b"))
 
+    def test_find_long_chain(self):
+        uf = UnionFind()
+        n = 5000  # deeper than the default recursion limit
+        for i in range(n):
+            uf.add(i)
+        for i in range(1, n):
+            uf.union(i, i - 1)
+        root = uf.find(0)
+        for i in range(n):
+            self.assertEqual(uf.find(i), root)
+
     def test_union(self):
         uf = UnionFind()
         uf.add("a")
@@ -54,6 +78,41 @@ class UnionFindTest(unittest.TestCase):
         for s in expected_sets:
             self.assertIn(s, sets)
 
+    def test_union_by_rank(self):
+        uf = UnionFind()
+        uf.add_all(["a", "b", "c"])
+        self.assertEqual(uf.union("a", "b"), "a")
+        # The single element goes under the bigger tree, whatever the order
+        self.assertEqual(uf.union("c", "a"), "a")
+        self.assertEqual(uf.find("c"), "a")
+        self.assertEqual(uf.rank["a"], 1)
+
+    def test_get_sets_cache(self):
+        uf = UnionFind()
+        uf.add_all(["a", "b", "c"])
+        sets = uf.get_sets()
+        # No change in between, so the same result is returned
+        self.assertIs(uf.get_sets(), sets)
+        uf.union("a", "b")
+        self.assertEqual(uf.get_sets(), [["a", "b"], ["c"]])
+        uf.add("d")
+        self.assertEqual(uf.get_sets(), [["a", "b"], ["c"], ["d"]])
+        # A union inside one set does not change the sets
+        sets = uf.get_sets()
+        uf.union("b", "a")
+        self.assertIs(uf.get_sets(), sets)
+
+    def test_get_sets_flattens(self):
+        uf = UnionFind()
+        uf.add_all(["a", "b", "c", "d"])
+        uf.union("a", "b")
+        uf.union("c", "d")
+        uf.union("a", "c")
+        uf.get_sets()
+        root = uf.find("a")
+        for el in ["a", "b", "c", "d"]:
+            self.assertEqual(uf.parent[el], root)
+
     def test_str(self):
         uf = UnionFind()
         uf.add("x")